@@ -5,62 +5,189 @@ a suite of tests against the Orchestration Agent.
 """
 import httpx
 import asyncio
+import contextlib
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
 from a2a.client import ClientConfig, ClientFactory, create_text_message_object
+from a2a.client.errors import A2AClientTimeoutError
 from a2a.types import AgentCard, TransportProtocol
 from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 
+AGENT_CARD_CACHE_DIR = Path.home() / ".cache" / "a2a" / "cards"
+
+# Read timeouts surface either raw from httpx or wrapped by the A2A transport
+RETRYABLE_TIMEOUT_ERRORS = (httpx.ReadTimeout, A2AClientTimeoutError)
+RETRY_BACKOFF_SECONDS = 0.5
+
+def _read_card_cache(cache_path: Path | None) -> dict | None:
+    """Loads a cached AgentCard entry ({etag, last_modified, body}) if present."""
+    if cache_path is None:
+        return None
+    try:
+        return json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def _write_card_cache(cache_path: Path | None, entry: dict) -> None:
+    """Persists an AgentCard entry; caching is best-effort and never fatal."""
+    if cache_path is None:
+        return
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps(entry))
+    except OSError:
+        pass
+
 class CommunicationClient:
-    """Client utility for sending messages to A2A endpoints."""
+    """Client utility for sending messages to A2A endpoints.
+
+    Owns a single pooled httpx.AsyncClient so consecutive dispatches reuse
+    keep-alive connections. Use as an async context manager, or call
+    aclose() when finished. Fetched AgentCards are kept on disk under
+    card_cache_dir (pass None to disable) and revalidated with conditional
+    requests, so an unchanged card is not downloaded again. A dispatch that
+    hits the read timeout is retried with exponential backoff, up to
+    max_attempts attempts in total. Retrying re-sends the message while the
+    agent may still be processing the first one, so only raise max_attempts
+    above 1 for messages that are safe to repeat (ticket-creating requests
+    are not).
+    """
     
-    def __init__(self, request_timeout: float = 240.0):
+    def __init__(
+        self,
+        request_timeout: float = 240.0,
+        card_cache_dir: Path | None = AGENT_CARD_CACHE_DIR,
+        read_timeout: float | None = None,
+        max_attempts: int = 1,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
         self._agent_metadata_cache: dict[str, dict | None] = {}
+        self._client_cache: dict[str, Any] = {}
+        self._metadata_lock = asyncio.Lock()
         self.request_timeout = request_timeout
-    
-    async def dispatch_message(self, agent_endpoint_url: str, content: str) -> str:
-        """Sends a message and returns the final text response."""
+        # The read timeout defaults to the overall request timeout
+        self.read_timeout = request_timeout if read_timeout is None else read_timeout
+        self.max_attempts = max_attempts
+        self.card_cache_dir = card_cache_dir
         
         timeout_settings = httpx.Timeout(
             timeout=self.request_timeout,
             connect=10.0,
-            read=self.request_timeout,
+            read=self.read_timeout,
             write=10.0,
             pool=5.0,
         )
+        self._http = httpx.AsyncClient(
+            timeout=timeout_settings,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        # The client configuration only depends on the shared HTTP pool
+        self._client_factory = ClientFactory(ClientConfig(
+            httpx_client=self._http,
+            supported_transports=[TransportProtocol.jsonrpc], 
+            use_client_preference=True,
+        ))
+    
+    async def __aenter__(self) -> "CommunicationClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Closes the underlying connection pool."""
+        await self._http.aclose()
+    
+    def _card_cache_path(self, agent_endpoint_url: str) -> Path | None:
+        if self.card_cache_dir is None:
+            return None
+        return self.card_cache_dir / f"{hashlib.sha1(agent_endpoint_url.encode()).hexdigest()}.json"
+    
+    async def _fetch_agent_metadata(self, agent_endpoint_url: str) -> dict:
+        """Fetches the AgentCard JSON, revalidating any copy cached on disk."""
+        cache_path = self._card_cache_path(agent_endpoint_url)
+        cached_entry = _read_card_cache(cache_path)
+        
+        request_headers = {}
+        if cached_entry:
+            if cached_entry.get("etag"):
+                request_headers["If-None-Match"] = cached_entry["etag"]
+            if cached_entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached_entry["last_modified"]
+        
+        metadata_url = f'{agent_endpoint_url}{AGENT_CARD_WELL_KNOWN_PATH}'
+        metadata_response = await self._http.get(metadata_url, headers=request_headers)
+        if metadata_response.status_code == 304 and cached_entry:
+            return cached_entry["body"]
+        
+        metadata_response.raise_for_status()
+        metadata = metadata_response.json()
+        etag = metadata_response.headers.get("ETag")
+        last_modified = metadata_response.headers.get("Last-Modified")
+        # Without a validator the entry could never be revalidated, so skip the write
+        if etag or last_modified:
+            _write_card_cache(cache_path, {"etag": etag, "last_modified": last_modified, "body": metadata})
+        return metadata
+    
+    async def _get_agent_client(self, agent_endpoint_url: str) -> Any:
+        """Returns the A2A client for an endpoint, building it once per URL."""
+        agent_client = self._client_cache.get(agent_endpoint_url)
+        if agent_client is not None:
+            return agent_client
         
-        async with httpx.AsyncClient(timeout=timeout_settings) as http_client:
+        # Concurrent first dispatches share one card fetch and client build per endpoint
+        async with self._metadata_lock:
+            agent_client = self._client_cache.get(agent_endpoint_url)
+            if agent_client is not None:
+                return agent_client
             
             if agent_endpoint_url not in self._agent_metadata_cache:
-                metadata_url = f'{agent_endpoint_url}{AGENT_CARD_WELL_KNOWN_PATH}'
-                metadata_response = await http_client.get(metadata_url)
-                metadata_response.raise_for_status()
-                self._agent_metadata_cache[agent_endpoint_url] = metadata_response.json()
+                self._agent_metadata_cache[agent_endpoint_url] = await self._fetch_agent_metadata(agent_endpoint_url)
             
-            metadata = self._agent_metadata_cache[agent_endpoint_url]
-            agent_card_object = AgentCard(**metadata)
-            
-            client_config = ClientConfig(
-                httpx_client=http_client,
-                supported_transports=[TransportProtocol.jsonrpc], 
-                use_client_preference=True,
-            )
-            
-            factory = ClientFactory(client_config)
-            agent_client = factory.create(agent_card_object)
-            
-            message_body = create_text_message_object(content=content)
-            
-            response_chunks = []
-            async for response in agent_client.send_message(message_body):
-                response_chunks.append(response)
-            
-            if (response_chunks and isinstance(response_chunks[0], tuple) and len(response_chunks[0]) > 0):
-                task = response_chunks[0][0]
+            agent_card_object = AgentCard(**self._agent_metadata_cache[agent_endpoint_url])
+            agent_client = self._client_factory.create(agent_card_object)
+            self._client_cache[agent_endpoint_url] = agent_client
+            return agent_client
+    
+    async def dispatch_message(self, agent_endpoint_url: str, content: str) -> str:
+        """Sends a message and returns the final text response."""
+        
+        agent_client = await self._get_agent_client(agent_endpoint_url)
+        
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await self._send_once(agent_client, content)
+            except RETRYABLE_TIMEOUT_ERRORS:
+                if attempt >= self.max_attempts:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    
+    async def _send_once(self, agent_client: Any, content: str) -> str:
+        """Performs a single send and extracts the response text."""
+        message_body = create_text_message_object(content=content)
+        
+        # Return on the first chunk that carries artifact text instead of
+        # buffering the whole stream; aclosing() shuts the stream down early.
+        last_task = None
+        async with contextlib.aclosing(agent_client.send_message(message_body)) as response_stream:
+            async for response in response_stream:
+                if not (isinstance(response, tuple) and len(response) > 0):
+                    continue
+                last_task = response[0]
                 try:
-                    return task.artifacts[0].parts[0].root.text
-                except (AttributeError, IndexError):
-                    return f"Received task object but could not extract text: {str(task)}"
-            
-            return 'No communication response received from agent.'
+                    response_text = last_task.artifacts[0].parts[0].root.text
+                except (AttributeError, IndexError, TypeError):
+                    continue
+                if response_text is not None:
+                    return response_text
+        
+        if last_task is not None:
+            return f"Received task object but could not extract text: {str(last_task)}"
+        
+        return 'No communication response received from agent.'
 
 # ============================================================================
 # TEST SCENARIOS
@@ -68,7 +195,6 @@ class CommunicationClient:
 
 async def execute_test_suite():
     """Runs a predefined suite of integration tests against the Orchestration Agent."""
-    test_comms_client = CommunicationClient(request_timeout=90.0)
     orchestrator_url = "http://127.0.0.1:9400"
 
     print("\n" + "="*80)
@@ -108,21 +234,26 @@ async def execute_test_suite():
         },
     ]
 
+    # The cases are independent, so dispatch them all at once and report in order
+    async with CommunicationClient(request_timeout=90.0, read_timeout=90.0) as test_comms_client:
+        dispatch_results = await asyncio.gather(
+            *[test_comms_client.dispatch_message(orchestrator_url, test["message"]) for test in test_cases],
+            return_exceptions=True,
+        )
+
     summary_results = []
-    for i, test in enumerate(test_cases, 1):
+    for i, (test, final_result) in enumerate(zip(test_cases, dispatch_results), 1):
         print(f"\n[{i}/{len(test_cases)}] {test['name']}")
         print(f"Notes: {test['notes']}")
         print(f"Expected: {test['expected']}")
         print("-" * 80)
         
-        try:
-            await asyncio.sleep(5.0)
-            final_result = await test_comms_client.dispatch_message(orchestrator_url, test["message"])
+        if isinstance(final_result, Exception):
+            print(f"\n✗ EXECUTION ERROR: {final_result}")
+            summary_results.append({"case": test["name"], "status": "FAIL", "error": str(final_result)})
+        else:
             print(f"\n✓ RESPONSE:\n{final_result}")
             summary_results.append({"case": test["name"], "status": "PASS"})
-        except Exception as e:
-            print(f"\n✗ EXECUTION ERROR: {e}")
-            summary_results.append({"case": test["name"], "status": "FAIL", "error": str(e)})
 
     print("\n" + "="*80)
     print("TEST SUITE SUMMARY")
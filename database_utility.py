@@ -1,22 +1,77 @@
 """
 database_utility.py: Database Connection Management
 Provides a thread-safe utility function to connect to the SQLite database.
-The database initialization (schema creation and seeding) is now handled 
+The database initialization (schema creation and seeding) is now handled
 by the mcp_server.py file.
 """
 import sqlite3
 import os
+import queue
+import functools
+import contextlib
 
 DATABASE_FILE = "service_db.sqlite"
 
-def get_db_connection():
-    """
-    Returns a thread-safe connection object to the service database.
+# Per-connection settings: relaxed fsync under WAL, in-memory temp tables,
+# a 64 MB page cache, 256 MB of memory-mapped I/O, and a 5s lock wait.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
 
-    The connection is configured for thread safety (check_same_thread=False)
-    and uses row_factory to enable dictionary-like access to query results.
-    """
+# Idle connections are kept warm (open file, populated page cache) for reuse.
+POOL_SIZE = 8
+_POOL: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE)
+
+@functools.cache
+def _enable_write_ahead_log(database_path: str) -> None:
+    """Switches the database file to WAL mode (persistent, so done once per file)."""
+    with sqlite3.connect(database_path) as init_conn:
+        init_conn.execute("PRAGMA journal_mode=WAL")
+    init_conn.close()
+
+def _open_connection() -> sqlite3.Connection:
+    """Opens a new thread-safe, WAL-mode connection to the service database."""
+    _enable_write_ahead_log(os.path.abspath(DATABASE_FILE))
     db_conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False)
     db_conn.row_factory = sqlite3.Row  # Enable dictionary-like row access (access columns by name)
+    for pragma in CONNECTION_PRAGMAS:
+        db_conn.execute(pragma)
     return db_conn
 
+@contextlib.contextmanager
+def db_conn():
+    """
+    Borrows a connection from the pool for the duration of a with-block.
+
+    A new connection is opened only when the pool is empty. On exit any
+    uncommitted transaction is rolled back and the connection is returned
+    to the pool (or closed if the pool is already full), so callers must
+    not close it themselves.
+    """
+    try:
+        conn = _POOL.get_nowait()
+    except queue.Empty:
+        conn = _open_connection()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _POOL.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@functools.cache
+def get_db_connection():
+    """
+    Returns the shared thread-safe connection object to the service database.
+
+    Kept for backwards compatibility; the same connection is returned on every
+    call, so it must not be closed. Prefer db_conn() for scoped access.
+    """
+    return _open_connection()
@@ -23,9 +23,9 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 
 try:
     from mcp_server import initialize_database_schema
-    # NOTE: The MCP server must be running separately for this script to work!
+    # The tools call the MCP service in-process unless MCP_ACCESS_SERVER_URL points elsewhere
     initialize_database_schema()
-    from service_tools import AGENT_TOOLS, _execute_mcp_operation
+    from service_tools import AGENT_TOOLS
 except ImportError:
     print("FATAL: Cannot load necessary components (mcp_server or service_tools).")
     sys.exit(1)
@@ -53,55 +53,64 @@ test_agent = Agent(
     tools=AGENT_TOOLS,
 )
 
+# One Runner (and its in-memory services) is shared by every scenario; each
+# test still gets its own session.
+test_runner = Runner(
+    app_name="TestRunner",
+    agent=test_agent,
+    artifact_service=InMemoryArtifactService(),
+    session_service=InMemorySessionService(),
+    memory_service=InMemoryMemoryService(),
+)
+
 # --- Runner Function (ASYNCHRONOUS) ---
-async def run_detailed_test(query: str): 
-    print(f"\n\n--- RUNNING TEST: {query} ---")
-
-    runner = Runner(
-        app_name="TestRunner",
-        agent=test_agent,
-        artifact_service=InMemoryArtifactService(),
-        session_service=InMemorySessionService(),
-        memory_service=InMemoryMemoryService(),
-    )
-    
-    session = await runner.session_service.create_session(user_id="test_user", app_name="TestRunner")
-    session_id = session.id 
+# Maximum number of scenarios talking to the LLM at once (rate control)
+TEST_CONCURRENCY = int(os.getenv("TEST_CONCURRENCY", "4"))
+
+async def run_detailed_test(query: str, user_id: str, session_id: str): 
+    # Output is collected and printed in one block so concurrent tests don't interleave
+    report = [f"\n\n--- RUNNING TEST: {query} ---"]
+    emit = report.append
+
+    runner = test_runner
 
     try:
         message_content = types.Content(parts=[types.Part(text=query)])
-        events_generator = runner.run(
-            user_id="test_user", 
+        events_generator = runner.run_async(
+            user_id=user_id, 
             session_id=session_id, 
             new_message=message_content  
         )
         
         final_text = ""
         
-        print("\n--- AGENT EXECUTION TRACE ---")
+        emit("\n--- AGENT EXECUTION TRACE ---")
         
-        for i, event in enumerate(events_generator, start=1): 
+        # Iterate asynchronously so concurrent tests keep the event loop free while waiting on the LLM
+        i = 0
+        async for event in events_generator:
+            i += 1
             
             # 1. Capture and display Tool Calls (Input to MCP)
             if hasattr(event, 'actions') and event.actions:
                 if hasattr(event.actions, 'function_call') and event.actions.function_call:
                     call = event.actions.function_call
-                    print(f"[{i}.0] 🛠️ TOOL CALL: {call.name}")
-                    print(f"      Args: {dict(call.args)}")
+                    emit(f"[{i}.0] 🛠️ TOOL CALL: {call.name}")
+                    emit(f"      Args: {dict(call.args)}")
 
             # 2. Capture and display Tool Results (Output from MCP)
             if hasattr(event, 'actions') and event.actions:
                 if hasattr(event.actions, 'function_response') and event.actions.function_response:
                     response = event.actions.function_response.response
                     
-                    print(f"[{i}.1] 💾 TOOL RESPONSE (RAW):")
+                    emit(f"[{i}.1] 💾 TOOL RESPONSE (RAW):")
                     
                     # Try to parse the string result into JSON for clean printing
                     try:
                         parsed_output = json.loads(response)
-                        print(json.dumps(parsed_output, indent=2))
+                        emit(json.dumps(parsed_output, indent=2))
                     except (json.JSONDecodeError, TypeError):
-                        print(response)
+                        emit(str(response))
             
             # 3. Capture the final formatted text from the LLM
             if hasattr(event, 'content') and event.content:
@@ -109,34 +118,56 @@ async def run_detailed_test(query: str):
                     if hasattr(part, 'text') and part.text:
                         final_text += part.text
 
-        print("\n--- FINAL CONSOLIDATED RESPONSE ---")
-        print(final_text.strip() if final_text else "Error: LLM did not return final text (ADK bug).")
-        print("-----------------------------------")
+        emit("\n--- FINAL CONSOLIDATED RESPONSE ---")
+        emit(final_text.strip() if final_text else "Error: LLM did not return final text (ADK bug).")
+        emit("-----------------------------------")
 
     except Exception as e:
-        print(f"\n!!! AGENT RUN FAILED: {type(e).__name__} !!!")
-        print(f"Error details: {e}")
+        emit(f"\n!!! AGENT RUN FAILED: {type(e).__name__} !!!")
+        emit(f"Error details: {e}")
+
+    print("\n".join(report))
 
 
 # --- Main Execution Wrapper ---
 async def main_test_wrapper():
-    """Executes all 5 test cases asynchronously."""
+    """Executes all 5 test cases, at most TEST_CONCURRENCY users at a time.
+    
+    Each test user gets one session, so later queries can reuse what the agent
+    already looked up for that customer; a user's queries run in order.
+    """
     
     test_cases = [
-        "Please get the full record for customer ID 1",
-        "I am customer ID 2 and need to upgrade my service plan.",
-        "Provide a list of all active accounts that currently have open tickets.",
-        "I was charged twice, I need a refund immediately! Account ID 1.",
-        "Change account ID 5's email to newemail@corp.com and then show me their ticket history.",
+        ("customer_1", "Please get the full record for customer ID 1"),
+        ("customer_2", "I am customer ID 2 and need to upgrade my service plan."),
+        ("operations", "Provide a list of all active accounts that currently have open tickets."),
+        ("customer_1", "I was charged twice, I need a refund immediately! Account ID 1."),
+        ("customer_5", "Change account ID 5's email to newemail@corp.com and then show me their ticket history."),
     ]
+    queries_by_user: dict[str, list[str]] = {}
+    for user_id, query in test_cases:
+        queries_by_user.setdefault(user_id, []).append(query)
     
-    for query in test_cases:
-        await run_detailed_test(query)
-        await asyncio.sleep(1) # Small pause between tests
+    semaphore = asyncio.Semaphore(TEST_CONCURRENCY)
+
+    async def run_user_session(user_id: str, queries: list[str]):
+        async with semaphore:
+            session = await test_runner.session_service.create_session(user_id=user_id, app_name="TestRunner")
+            for query in queries:
+                await run_detailed_test(query, user_id, session.id)
+
+    session_results = await asyncio.gather(
+        *(run_user_session(user_id, queries) for user_id, queries in queries_by_user.items()),
+        return_exceptions=True,
+    )
+    # Failures outside run_detailed_test (e.g. session creation) are reported per user
+    for user_id, session_result in zip(queries_by_user, session_results):
+        if isinstance(session_result, Exception):
+            print(f"\n✗ SESSION ERROR for {user_id}: {session_result}")
 
 if __name__ == "__main__":
     print("--- Starting Single-Agent Diagnostic Tool Chain Test ---")
-    print("NOTE: The MCP Server must be running on port 8000 for tool execution to succeed.")
+    print("NOTE: Tools run in-process; if MCP_ACCESS_SERVER_URL is set, that MCP server must be running.")
     
     try:
         asyncio.run(main_test_wrapper())
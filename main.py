@@ -6,12 +6,16 @@ integration test suite. Incorporates all final fixes for robust execution.
 """
 import warnings
 import asyncio
-import time
 import logging
 import os
 import sys
 from dotenv import load_dotenv 
 
+try:
+    import uvloop  # Optional: faster event loop for the servers and test client (not available on Windows)
+except ImportError:
+    uvloop = None
+
 # ----------------------------------------------------------------------
 # 0. INITIAL SETUP & ENVIRONMENT CHECK
 # ----------------------------------------------------------------------
@@ -49,38 +53,43 @@ import service_tools
 import agent_definitions
 
 # Server deployment and client logic
-from server_launcher import start_server_daemon
+from server_launcher import SERVICE_PORT, launch_all_service_servers, wait_for_port
 from client_runner import execute_test_suite
 
 # ----------------------------------------------------------------------
 # 2. MAIN EXECUTION BLOCK
 # ----------------------------------------------------------------------
 
-if __name__ == "__main__":
-    print("\n--- Multi-Agent System: Initialization & Test Launch ---")
+async def run_system():
+    """Serves all services and runs the integration tests on a single event loop."""
+    server_task = asyncio.create_task(launch_all_service_servers())
     
-    # Start the A2A servers and MCP server in a background daemon thread
-    server_process = start_server_daemon()
-    
-    print("Waiting for background services to stabilize...")
-    time.sleep(5)
+    print("Waiting for services to accept connections...")
+    try:
+        await wait_for_port(SERVICE_PORT, timeout=30)
+    except TimeoutError:
+        print("WARNING: Services did not report ready within 30s; running tests anyway.")
     
     print("\n--- Running Integration Test Scenarios ---\n")
     
-    # Run the test suite on the main thread
     try:
         # Executes the test client, which hits the Orchestration Agent (Router)
-        asyncio.run(execute_test_suite())
+        await execute_test_suite()
     except Exception as e:
         print(f"\nFATAL ERROR DURING TEST EXECUTION: {e}")
     
     print("\n--- All tests completed. Services still running. ---")
     
-    # Keep the main thread alive so the daemon thread can continue to serve requests
+    # Keep serving requests until interrupted
+    await server_task
+
+if __name__ == "__main__":
+    print("\n--- Multi-Agent System: Initialization & Test Launch ---")
+    
     try:
-        while server_process.is_alive():
-            time.sleep(1)
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+            runner.run(run_system())
     except KeyboardInterrupt:
         print("\nProcess interrupted by user. Shutting down.")
     
-    print("Application terminated.")
\ No newline at end of file
+    print("Application terminated.")
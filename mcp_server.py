@@ -6,12 +6,59 @@ allowing agents to perform CRUD operations via well-defined tools.
 import sqlite3
 import datetime
 import asyncio
+import functools
+import inspect
+import itertools
+import json
 import uvicorn
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import Response, StreamingResponse
 from starlette.routing import Route
 
-DB_FILENAME = "service_db.sqlite"
+try:
+    import orjson  # Optional: faster JSON encoding and decoding
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop  # Optional: libuv-based event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
+from database_utility import DATABASE_FILE, db_conn
+
+DB_FILENAME = DATABASE_FILE
+
+# Explicit column lists for the hot read queries
+CUSTOMER_COLUMNS = "identifier, full_name, contact_email, contact_phone, account_status, creation_timestamp, last_modified_timestamp"
+TICKET_COLUMNS = "ticket_id, account_id, description, status, priority_level, submission_timestamp"
+
+# List operations whose rows /call can stream as NDJSON
+STREAMABLE_OPERATIONS = frozenset({"list_customers", "get_customer_history"})
+
+# Ticket priority levels accepted by create_ticket / create_tickets
+_VALID_PRIORITIES = frozenset({"low", "medium", "high"})
+
+# Customer columns that update_customer may change
+_VALID_UPDATE_FIELDS = frozenset({"full_name", "contact_email", "contact_phone", "account_status"})
+
+@functools.cache
+def _update_customer_sql(fields: tuple[str, ...]) -> str:
+    """Builds (once per field combination) the UPDATE statement for the given columns."""
+    set_clause = ", ".join(f"{k}=?" for k in fields)
+    return f"UPDATE customer_accounts SET {set_clause}, last_modified_timestamp=? WHERE identifier=? RETURNING *"
+
+@functools.cache
+def _insert_ticket_sql(priority: str) -> str:
+    """Builds (once per priority) the ticket INSERT with status and priority folded in as literals.
+
+    The priority must already be checked against _VALID_PRIORITIES; it is
+    interpolated into the SQL text, so unvalidated input must never reach here.
+    """
+    return (
+        "INSERT INTO support_tickets (account_id, description, status, priority_level, submission_timestamp) "
+        f"VALUES (?, ?, 'open', '{priority}', ?) RETURNING {TICKET_COLUMNS}"
+    )
 
 def get_threadsafe_db_connector():
     """Establishes a thread-safe connection to the SQLite database."""
@@ -19,17 +66,29 @@ def get_threadsafe_db_connector():
     connector.row_factory = sqlite3.Row # Allows column access by name
     return connector
 
+def _values_placeholders(rows: list) -> str:
+    """Placeholder groups for inserting all rows with one multi-row VALUES statement."""
+    row_placeholders = "(" + ",".join("?" * len(rows[0])) + ")"
+    return ",".join([row_placeholders] * len(rows))
+
 # This initialization function is needed if the MCP server is run first.
 def initialize_database_schema():
     """Sets up and seeds the customer and ticket tables for the server's use."""
     connector = get_threadsafe_db_connector()
     cursor = connector.cursor()
     
-    # Reset tables to match the original deterministic seeding logic
+    # WAL lets the pooled reader connections proceed while writes are in flight
+    cursor.execute("PRAGMA journal_mode=WAL;")
+    
+    # Rebuild and seed in a single transaction; fsync is skipped until it commits.
+    # PRAGMA foreign_keys is a no-op inside a transaction, so it is toggled outside.
+    cursor.execute("PRAGMA synchronous=OFF;")
     cursor.execute("PRAGMA foreign_keys = OFF;")
+    cursor.execute("BEGIN;")
+    
+    # Reset tables to match the original deterministic seeding logic
     cursor.execute("DROP TABLE IF EXISTS support_tickets;")
     cursor.execute("DROP TABLE IF EXISTS customer_accounts;")
-    cursor.execute("PRAGMA foreign_keys = ON;")
     
     # Create customer_accounts table
     cursor.execute("""
@@ -52,7 +111,6 @@ def initialize_database_schema():
             priority_level TEXT,
             submission_timestamp TEXT
         )""")
-    connector.commit()
     
     # Insert seed data
     current_utc = datetime.datetime.now(datetime.UTC).isoformat()
@@ -64,9 +122,10 @@ def initialize_database_schema():
         (5, "Eve Standard", "eve@example.com", "555-555-5555", "active", current_utc, current_utc),
         (12345, "Priya Patel (Premium)", "priya@example.com", "555-0999", "active", current_utc, current_utc),
     ]
-    cursor.executemany(
-        "INSERT INTO customer_accounts (identifier, full_name, contact_email, contact_phone, account_status, creation_timestamp, last_modified_timestamp) VALUES (?,?,?,?,?,?,?)",
-        account_data
+    cursor.execute(
+        "INSERT INTO customer_accounts (identifier, full_name, contact_email, contact_phone, account_status, creation_timestamp, last_modified_timestamp) VALUES "
+        + _values_placeholders(account_data),
+        [value for row in account_data for value in row]
     )
     ticket_data = [
         (1, "Billing duplicate charge", "open", "high", current_utc),
@@ -77,11 +136,19 @@ def initialize_database_schema():
         (12345, "Account upgrade assistance", "open", "medium", current_utc),
         (12345, "High priority refund review", "open", "high", current_utc),
     ]
-    cursor.executemany(
-        "INSERT INTO support_tickets (account_id, description, status, priority_level, submission_timestamp) VALUES (?,?,?,?,?)",
-        ticket_data
+    cursor.execute(
+        "INSERT INTO support_tickets (account_id, description, status, priority_level, submission_timestamp) VALUES "
+        + _values_placeholders(ticket_data),
+        [value for row in ticket_data for value in row]
     )
+    
+    # Index the per-customer ticket history and the status filter, then refresh planner statistics
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_account_time ON support_tickets(account_id, submission_timestamp DESC);")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_status ON customer_accounts(account_status);")
+    cursor.execute("ANALYZE;")
     connector.commit()
+    cursor.execute("PRAGMA synchronous=NORMAL;")
+    cursor.execute("PRAGMA foreign_keys = ON;")
     print(f"Database schema initialized and seeded at {DB_FILENAME}")
     connector.close()
 
@@ -89,121 +156,205 @@ def initialize_database_schema():
 class DataAccessService:
     """Manages the callable database operations (tools)."""
     
-    def __init__(self):
-        self.operations = {
-            "get_customer": self._fetch_customer_record,
-            "list_customers": self._search_customer_records,
-            "update_customer": self._modify_customer_details,
-            "create_ticket": self._register_new_ticket,
-            "get_customer_history": self._retrieve_ticket_history,
-        }
-    
-    async def _fetch_customer_record(self, customer_id: int):
+    def _fetch_customer_record(self, customer_id: int):
         """MCP operation: Retrieve customer by ID."""
-        conn = get_threadsafe_db_connector()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM customer_accounts WHERE identifier=?", (customer_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_conn() as conn:
+            row = conn.execute(f"SELECT {CUSTOMER_COLUMNS} FROM customer_accounts WHERE identifier=?", (customer_id,)).fetchone()
         if row:
             return {"success": True, "data": dict(row)}
         return {"success": False, "error": f"Account with ID {customer_id} not found"}
     
-    async def _search_customer_records(self, status: str = None, limit: int = 100):
+    def _search_customer_records(self, status: str = None, limit: int = 100):
         """MCP operation: List accounts, optionally filtered by status."""
-        conn = get_threadsafe_db_connector()
-        cursor = conn.cursor()
-        if status:
-            cursor.execute("SELECT * FROM customer_accounts WHERE account_status=? LIMIT ?", (status, limit))
-        else:
-            cursor.execute("SELECT * FROM customer_accounts LIMIT ?", (limit,))
-        rows = cursor.fetchall()
-        conn.close()
+        with db_conn() as conn:
+            rows = conn.execute(*self._customer_list_query(status, limit)).fetchall()
         return {"success": True, "data": [dict(r) for r in rows], "total_count": len(rows)}
     
-    async def _modify_customer_details(self, customer_id: int, data: dict):
+    def _modify_customer_details(self, customer_id: int, data: dict):
         """MCP operation: Update specific customer fields."""
-        conn = get_threadsafe_db_connector()
-        cursor = conn.cursor()
-        
-        # Build update query (paraphrased column names)
-        valid_fields = ["full_name", "contact_email", "contact_phone", "account_status"]
-        updates = {k: v for k, v in data.items() if k in valid_fields}
-        
-        if not updates:
-            conn.close()
+        # Validate before touching the database (paraphrased column names)
+        unknown_fields = data.keys() - _VALID_UPDATE_FIELDS
+        if unknown_fields:
+            return {"success": False, "error": f"Unknown fields for update: {', '.join(sorted(unknown_fields))}"}
+        if not data:
             return {"success": False, "error": "No valid fields provided for update."}
         
-        set_clause = ", ".join([f"{k}=?" for k in updates.keys()])
-        params = list(updates.values()) + [datetime.datetime.now(datetime.UTC).isoformat(), customer_id]
+        fields = tuple(sorted(data))
+        params = [data[k] for k in fields] + [datetime.datetime.now(datetime.UTC).isoformat(), customer_id]
         
-        cursor.execute(
-            f"UPDATE customer_accounts SET {set_clause}, last_modified_timestamp=? WHERE identifier=?", 
-            params
-        )
-        conn.commit()
+        # Update and read back the row in one statement
+        with db_conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(_update_customer_sql(fields), params).fetchall()
+            conn.commit()
         
-        # Fetch and return updated record
-        cursor.execute("SELECT * FROM customer_accounts WHERE identifier=?", (customer_id,))
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {"success": True, "data": dict(row)}
+        if rows:
+            return {"success": True, "data": dict(rows[0])}
         return {"success": False, "error": f"Account {customer_id} not found or update failed."}
     
-    async def _register_new_ticket(self, customer_id: int, issue: str, priority: str = "medium"):
+    def _register_new_ticket(self, customer_id: int, issue: str, priority: str = "medium"):
         """MCP operation: Create a new support ticket."""
-        conn = get_threadsafe_db_connector()
-        cursor = conn.cursor()
-        
         normalized_priority = priority.lower()
-        if normalized_priority not in ["low", "medium", "high"]:
-            conn.close()
+        if normalized_priority not in _VALID_PRIORITIES:
             return {"success": False, "error": "Priority must be 'low', 'medium', or 'high'."}
         
         current_utc = datetime.datetime.now(datetime.UTC).isoformat()
-        cursor.execute(
-            "INSERT INTO support_tickets (account_id, description, status, priority_level, submission_timestamp) VALUES (?, ?, ?, ?, ?)",
-            (customer_id, issue, "open", normalized_priority, current_utc)
-        )
-        conn.commit()
-        new_ticket_id = cursor.lastrowid
-        cursor.execute("SELECT * FROM support_tickets WHERE ticket_id=?", (new_ticket_id,))
-        row = cursor.fetchone()
-        conn.close()
+        with db_conn() as conn:
+            # Insert and read back the new ticket in one statement
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                _insert_ticket_sql(normalized_priority),
+                (customer_id, issue, current_utc)
+            ).fetchall()
+            conn.commit()
         
-        if row:
-            return {"success": True, "data": dict(row)}
+        if rows:
+            return {"success": True, "data": dict(rows[0])}
         return {"success": False, "error": "Database error: Failed to log new ticket."}
     
-    async def _retrieve_ticket_history(self, customer_id: int):
+    def _register_new_tickets(self, tickets: list):
+        """MCP operation: Create several support tickets in a single transaction."""
+        current_utc = datetime.datetime.now(datetime.UTC).isoformat()
+        rows = []
+        for ticket in tickets:
+            customer_id, issue = ticket.get("customer_id"), ticket.get("issue")
+            if not isinstance(customer_id, int) or isinstance(customer_id, bool):
+                return {"success": False, "error": "Each ticket needs an integer customer_id."}
+            if not isinstance(issue, str) or not issue.strip():
+                return {"success": False, "error": "Each ticket needs a non-empty issue description."}
+            normalized_priority = str(ticket.get("priority", "medium")).lower()
+            if normalized_priority not in _VALID_PRIORITIES:
+                return {"success": False, "error": "Priority must be 'low', 'medium', or 'high'."}
+            rows.append((customer_id, issue, "open", normalized_priority, current_utc))
+        if not rows:
+            return {"success": False, "error": "No tickets provided."}
+        
+        with db_conn() as conn:
+            # Hold the write lock so the new IDs are exactly those above the current maximum
+            conn.execute("BEGIN IMMEDIATE")
+            last_ticket_id = conn.execute("SELECT COALESCE(MAX(ticket_id), 0) FROM support_tickets").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO support_tickets (account_id, description, status, priority_level, submission_timestamp) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            created_rows = conn.execute(
+                "SELECT * FROM support_tickets WHERE ticket_id > ? ORDER BY ticket_id", (last_ticket_id,)
+            ).fetchall()
+            conn.commit()
+        
+        return {"success": True, "data": [dict(r) for r in created_rows], "total_count": len(created_rows)}
+    
+    def _retrieve_ticket_history(self, customer_id: int):
         """MCP operation: Get all tickets for a customer ID."""
-        conn = get_threadsafe_db_connector()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM support_tickets WHERE account_id=? ORDER BY submission_timestamp DESC",
-            (customer_id,)
-        )
-        rows = cursor.fetchall()
-        conn.close()
+        with db_conn() as conn:
+            rows = conn.execute(*self._ticket_history_query(customer_id)).fetchall()
+        return {"success": True, "data": [dict(r) for r in rows], "total_count": len(rows)}
+    
+    def _search_active_accounts_with_open_tickets(self, limit: int = 100):
+        """MCP operation: List active accounts that have at least one open ticket."""
+        with db_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT c.*, COUNT(t.ticket_id) AS open_ticket_count
+                FROM customer_accounts c
+                JOIN support_tickets t ON t.account_id = c.identifier
+                WHERE c.account_status = 'active' AND t.status = 'open'
+                GROUP BY c.identifier
+                ORDER BY c.identifier
+                LIMIT ?
+                """,
+                (limit,)
+            ).fetchall()
         return {"success": True, "data": [dict(r) for r in rows], "total_count": len(rows)}
     
+    def _customer_list_query(self, status: str = None, limit: int = 100):
+        """SQL and parameters for list_customers."""
+        if status:
+            return f"SELECT {CUSTOMER_COLUMNS} FROM customer_accounts WHERE account_status=? LIMIT ?", (status, limit)
+        return f"SELECT {CUSTOMER_COLUMNS} FROM customer_accounts LIMIT ?", (limit,)
+    
+    def _ticket_history_query(self, customer_id: int):
+        """SQL and parameters for get_customer_history."""
+        return f"SELECT {TICKET_COLUMNS} FROM support_tickets WHERE account_id=? ORDER BY submission_timestamp DESC", (customer_id,)
+    
+    def stream_rows(self, operation_name: str, **kwargs):
+        """Returns a lazy iterator over the rows of a streamable list operation.
+        
+        Blocking: the query is executed up to its first row before returning,
+        so bad parameter names and values both raise here, before a response
+        starts. The remaining rows are read as the iterator is consumed.
+        """
+        match operation_name:
+            case "list_customers":
+                query = self._customer_list_query(**kwargs)
+            case "get_customer_history":
+                query = self._ticket_history_query(**kwargs)
+            case _:
+                raise ValueError(f"Operation does not support streaming: {operation_name}")
+        rows = self._iter_rows(*query)
+        first_row = next(rows, None)
+        if first_row is None:
+            return iter(())
+        return itertools.chain((first_row,), rows)
+    
+    def _iter_rows(self, sql: str, params: tuple):
+        with db_conn() as conn:
+            for row in conn.execute(sql, params):
+                yield dict(row)
+    
     async def execute_operation(self, operation_name: str, **kwargs):
         """Executes a database operation by name."""
-        if operation_name not in self.operations:
-            return {"success": False, "error": f"Unknown database operation: {operation_name}"}
+        match operation_name:
+            case "get_customer":
+                operation = self._fetch_customer_record
+            case "list_customers":
+                operation = self._search_customer_records
+            case "update_customer":
+                operation = self._modify_customer_details
+            case "create_ticket":
+                operation = self._register_new_ticket
+            case "create_tickets":
+                operation = self._register_new_tickets
+            case "get_customer_history":
+                operation = self._retrieve_ticket_history
+            case "list_active_customers_with_open_tickets":
+                operation = self._search_active_accounts_with_open_tickets
+            case _:
+                return {"success": False, "error": f"Unknown database operation: {operation_name}"}
         try:
-            # Execute the async method
-            return await self.operations[operation_name](**kwargs)
+            # Coroutine operations run on the loop; blocking sqlite work runs in a worker thread
+            if inspect.iscoroutinefunction(operation):
+                return await operation(**kwargs)
+            return await asyncio.to_thread(operation, **kwargs)
         except Exception as e:
             # Catch execution errors within the tool logic
-            return {"success": False, "error": f"Operation execution failed: {type(e).__name__} - {str(e)}"}
+            return _execution_failure(e)
 
 
+def _execution_failure(error: Exception) -> dict:
+    """The result dict reported when an operation raises."""
+    return {"success": False, "error": f"Operation execution failed: {type(error).__name__} - {str(error)}"}
+
 # Create the service instance
 data_service = DataAccessService()
 
+def _encode_json(content) -> bytes:
+    """Compact JSON bytes, via orjson when it is installed."""
+    if orjson is None:
+        return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return orjson.dumps(content)
+
+def _decode_json(body: bytes):
+    """Parses a JSON request body, via orjson when it is installed."""
+    if orjson is None:
+        return json.loads(body)
+    return orjson.loads(body)
+
+def _json(content, status_code: int = 200) -> Response:
+    """JSON response encoded with _encode_json instead of Starlette's stdlib encoder."""
+    return Response(_encode_json(content), status_code=status_code, media_type="application/json")
+
+
 # HTTP Handlers for the Starlette Application
 async def list_available_tools_handler(request):
     """GET /tools: Provides documentation for available operations."""
@@ -213,23 +364,35 @@ async def list_available_tools_handler(request):
         {"name": "list_customers", "description": "Search accounts, optionally filtered by status.", "parameters": {"status": "string (optional)", "limit": "integer (optional)"}},
         {"name": "update_customer", "description": "Modify customer record details.", "parameters": {"customer_id": "integer", "data": "JSON object of fields to update"}},
         {"name": "create_ticket", "description": "Log a new support ticket.", "parameters": {"customer_id": "integer", "issue": "string", "priority": "string (low/medium/high)"}},
+        {"name": "create_tickets", "description": "Log several support tickets in one transaction.", "parameters": {"tickets": "list of {customer_id, issue, priority} objects"}},
         {"name": "get_customer_history", "description": "Get all historical tickets for an account.", "parameters": {"customer_id": "integer"}},
+        {"name": "list_active_customers_with_open_tickets", "description": "List active accounts that have at least one open ticket.", "parameters": {"limit": "integer (optional)"}},
     ]
-    return JSONResponse({"available_operations": tool_list})
+    return _json({"available_operations": tool_list})
 
 
 async def call_operation_handler(request):
     """POST /call: Executes a named operation with parameters."""
     try:
-        request_body = await request.json()
+        request_body = _decode_json(await request.body())
         op_name = request_body.get("tool")
         op_params = request_body.get("params", {})
         
+        # Large list results can be streamed one NDJSON row at a time; Starlette
+        # pulls the rows from the database in its threadpool. Failures before the
+        # first row get the same error body as the buffered path.
+        if request_body.get("stream") and op_name in STREAMABLE_OPERATIONS:
+            try:
+                rows = await asyncio.to_thread(data_service.stream_rows, op_name, **op_params)
+            except Exception as e:
+                return _json(_execution_failure(e))
+            return StreamingResponse((_encode_json(row) + b"\n" for row in rows), media_type="application/x-ndjson")
+        
         # Delegate to the DataAccessService
         result = await data_service.execute_operation(op_name, **op_params)
-        return JSONResponse(result)
+        return _json(result)
     except Exception as e:
-        return JSONResponse({"success": False, "error": f"Invalid request format: {str(e)}"}, status_code=400)
+        return _json({"success": False, "error": f"Invalid request format: {str(e)}"}, status_code=400)
 
 
 # Define the Starlette application routes
@@ -262,5 +425,6 @@ if __name__ == "__main__":
     print("\nStarting MCP Server on http://127.0.0.1:8000")
     print("Press Ctrl+C to stop\n")
     
-    # Execute the asynchronous server startup function
-    asyncio.run(run_mcp_server_async())
\ No newline at end of file
+    # Execute the asynchronous server startup function (on uvloop when installed)
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(run_mcp_server_async())
\ No newline at end of file
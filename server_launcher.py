@@ -1,10 +1,12 @@
 import asyncio
+import hashlib
 import threading
 import uvicorn
-import nest_asyncio
 import logging
 import time
 
+from starlette.applications import Starlette
+from starlette.routing import Mount
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
@@ -17,6 +19,7 @@ from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 
 from agent_definitions import (
     customer_info_agent,
@@ -27,9 +30,12 @@ from agent_definitions import (
     orchestration_agent_card,
 )
 
-from mcp_server import run_mcp_server_async
+from mcp_server import initialize_database_schema, mcp_api_app
 
-nest_asyncio.apply()
+try:
+    import uvloop  # Optional: libuv-based event loop for the servers (not available on Windows)
+except ImportError:
+    uvloop = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -38,13 +44,22 @@ logging.basicConfig(
 logging.getLogger("uvicorn.server").setLevel(logging.WARNING)
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
+# All services share one Uvicorn server: MCP under /mcp, the specialist
+# agents under /info and /support, and the orchestrator at the root.
+SERVICE_PORT = 9400
+
+# In-memory services shared by every agent's Runner; their state is keyed by app_name
+artifact_service = InMemoryArtifactService()
+session_service = InMemorySessionService()
+memory_service = InMemoryMemoryService()
+
 def create_adk_server_application(agent: object, metadata_card: AgentCard) -> A2AStarletteApplication:
     execution_runner = Runner(
         app_name=agent.name,
         agent=agent,
-        artifact_service=InMemoryArtifactService(),
-        session_service=InMemorySessionService(),
-        memory_service=InMemoryMemoryService(),
+        artifact_service=artifact_service,
+        session_service=session_service,
+        memory_service=memory_service,
     )
 
     executor_config = A2aAgentExecutorConfig()
@@ -59,11 +74,57 @@ def create_adk_server_application(agent: object, metadata_card: AgentCard) -> A2
         agent_card=metadata_card, http_handler=request_flow_handler
     )
 
-async def launch_single_agent_server(agent: object, metadata_card: AgentCard, port: int):
-    server_app = create_adk_server_application(agent, metadata_card)
+class AgentCardETagMiddleware:
+    """ASGI wrapper giving an agent app's AgentCard endpoint an ETag validator.
+
+    The card is fixed for the life of the process, so its tag is computed once;
+    a GET whose If-None-Match carries it is answered with 304 and no body.
+    """
+
+    def __init__(self, app, metadata_card: AgentCard):
+        self.app = app
+        self.etag = f'"{hashlib.sha1(metadata_card.model_dump_json().encode()).hexdigest()}"'.encode()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].endswith(AGENT_CARD_WELL_KNOWN_PATH)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = dict(scope["headers"]).get(b"if-none-match", b"")
+        if self.etag in (tag.strip() for tag in if_none_match.split(b",")):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", self.etag)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message = {**message, "headers": [*message.get("headers", []), (b"etag", self.etag)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+def _agent_app(agent: object, metadata_card: AgentCard):
+    """Builds an agent's A2A ASGI app with a revalidatable AgentCard endpoint."""
+    return AgentCardETagMiddleware(create_adk_server_application(agent, metadata_card).build(), metadata_card)
+
+def build_service_application() -> Starlette:
+    """Mounts the MCP API and the three A2A agent apps on a single ASGI app."""
+    return Starlette(routes=[
+        Mount("/mcp", app=mcp_api_app),
+        Mount("/info", app=_agent_app(customer_info_agent, info_agent_card())),
+        Mount("/support", app=_agent_app(support_specialist_agent, support_agent_card())),
+        Mount("", app=_agent_app(orchestration_agent, orchestration_agent_card())),
+    ])
+
+async def launch_service_server(port: int = SERVICE_PORT):
+    initialize_database_schema()
 
     uvicorn_config = uvicorn.Config(
-        server_app.build(),
+        build_service_application(),
         host='127.0.0.1',
         port=port,
         log_level='info',
@@ -71,32 +132,39 @@ async def launch_single_agent_server(agent: object, metadata_card: AgentCard, po
     )
 
     server_instance = uvicorn.Server(uvicorn_config)
-    print(f"[*] {agent.name.title().replace('_', ' ')} starting on http://127.0.0.1:{port}")
+    print(f"[*] MCP, Customer Info, Support Specialist and Orchestration services starting on http://127.0.0.1:{port}")
     await server_instance.serve()
 
+async def wait_for_port(port: int, timeout: float = 10.0):
+    """Waits until a local server accepts TCP connections on the given port."""
+    async with asyncio.timeout(timeout):
+        while True:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                await asyncio.sleep(0.05)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            return
+
 async def launch_all_service_servers():
     print("\n" + "="*60)
     print("Initiating All Microservices...")
     print("="*60)
     
-    server_launch_tasks = [
-        asyncio.create_task(run_mcp_server_async()), 
+    async with asyncio.TaskGroup() as server_tasks:
+        server_tasks.create_task(launch_service_server())
         
-        asyncio.create_task(launch_single_agent_server(customer_info_agent, info_agent_card, 9300)),
-        asyncio.create_task(launch_single_agent_server(support_specialist_agent, support_agent_card, 9301)),
-        asyncio.create_task(launch_single_agent_server(orchestration_agent, orchestration_agent_card, 9400)),
-    ]
-    
-    await asyncio.sleep(4)
-    
-    print("\n[READY] All service servers deployed!")
-    print(f"    - Orchestration Entry Point: http://127.0.0.1:9400")
-    print("="*60 + "\n")
-    
-    await asyncio.gather(*server_launch_tasks)
+        await wait_for_port(SERVICE_PORT)
+        
+        print("\n[READY] All service servers deployed!")
+        print(f"    - Orchestration Entry Point: http://127.0.0.1:{SERVICE_PORT}")
+        print(f"    - MCP Data Access API:       http://127.0.0.1:{SERVICE_PORT}/mcp")
+        print("="*60 + "\n")
 
 def run_servers_in_background():
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
         loop.run_until_complete(launch_all_service_servers())
@@ -110,6 +178,7 @@ def run_servers_in_background():
         loop.close()
 
 def start_server_daemon():
+    """Runs the services on a background thread; for hosts that own the main loop, e.g. notebooks."""
     server_thread = threading.Thread(target=run_servers_in_background, daemon=True)
     server_thread.start()
     return server_thread
\ No newline at end of file
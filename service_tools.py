@@ -1,73 +1,282 @@
 import httpx
 import asyncio
 import json
-from typing import Optional, List
+import os
+import time
+import weakref
+from typing import Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, ValidationError
 
-MCP_ACCESS_SERVER_URL = "http://127.0.0.1:8000"
+try:
+    import orjson  # Optional: faster JSON encoding of tool results
+except ImportError:
+    orjson = None
 
-async def _execute_mcp_operation_async(operation_name: str, **parameters) -> str:
-    """Async version of MCP operation execution with longer timeout."""
+# The MCP API is mounted under /mcp on the shared service server; point this at
+# http://127.0.0.1:8000 when running mcp_server.py on its own.
+DEFAULT_MCP_ACCESS_SERVER_URL = "http://127.0.0.1:9400/mcp"
+MCP_ACCESS_SERVER_URL = os.getenv("MCP_ACCESS_SERVER_URL", DEFAULT_MCP_ACCESS_SERVER_URL)
+
+# When the MCP URL is the default one, the MCP service lives in this process
+# (main.py, llm_mcp_test.py), so call it directly instead of over loopback HTTP.
+# Any other URL is always used over HTTP; MCP_INPROC=0 also forces HTTP.
+USE_INPROC_MCP = (
+    os.getenv("MCP_INPROC", "1") == "1"
+    and MCP_ACCESS_SERVER_URL.rstrip("/") == DEFAULT_MCP_ACCESS_SERVER_URL
+)
+if USE_INPROC_MCP:
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{MCP_ACCESS_SERVER_URL}/call",
-                json={"tool": operation_name, "params": parameters}
-            )
-            response.raise_for_status()
-            operation_result = response.json()
-            
-            if operation_result.get("success"):
-                returned_data = operation_result.get("data")
-                if isinstance(returned_data, (dict, list)):
-                    return json.dumps(returned_data, indent=2)
-                return str(returned_data)
-            else:
-                return f"Operation Error: {operation_result.get('error', 'Unknown service error')}"
+        from mcp_server import data_service
+    except ImportError:
+        data_service = None
+else:
+    data_service = None
+
+# Short-lived cache for idempotent reads, keyed on the operation and its
+# parameters. Writes evict the affected customers' entries and all list results.
+READ_CACHE_TTL_SECONDS = 5.0
+READ_CACHE_MAXSIZE = 1024
+READ_OPERATIONS = frozenset({"get_customer", "get_customer_history", "list_customers", "list_active_customers_with_open_tickets"})
+WRITE_OPERATIONS = frozenset({"update_customer", "create_ticket", "create_tickets"})
+_read_cache: dict[str, tuple[float, str, Optional[int]]] = {}
+# Per-key single-flight locks with the number of callers using each, so a lock
+# is only dropped once nobody holds or waits on it
+_read_locks: dict[str, list] = {}
+# Write generation per customer_id, plus one under None bumped by every write
+# (list results). A read only caches its result if its generation is unchanged,
+# so a read that overlapped a write cannot re-cache the pre-write data.
+_write_generations: dict[Optional[int], int] = {}
+_FAILURE_PREFIXES = ("Operation Error", "Service Execution Failure")
+
+# List operations the MCP server can stream as NDJSON over HTTP
+STREAMABLE_OPERATIONS = frozenset({"list_customers", "get_customer_history"})
+
+# One pooled keep-alive client per event loop; an httpx client must not be
+# shared across loops (e.g. tools called from a notebook's loop while the
+# agents run on start_server_daemon's background loop).
+_mcp_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def _get_mcp_client() -> httpx.AsyncClient:
+    """Returns the MCP HTTP client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _mcp_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=MCP_ACCESS_SERVER_URL,
+            timeout=httpx.Timeout(120.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+        _mcp_clients[loop] = client
+    return client
+
+async def aclose_mcp_client() -> None:
+    """Closes the running loop's MCP client; call before the loop shuts down."""
+    client = _mcp_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def _dumps_compact(data) -> str:
+    """Serializes tool data as compact JSON; the agent does not need it pretty-printed."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def _format_operation_result(operation_result: dict) -> str:
+    """Renders a DataAccessService result dict as the text returned to the agent."""
+    if operation_result.get("success"):
+        returned_data = operation_result.get("data")
+        if isinstance(returned_data, (dict, list)):
+            return _dumps_compact(returned_data)
+        return str(returned_data)
+    else:
+        return f"Operation Error: {operation_result.get('error', 'Unknown service error')}"
+
+async def _stream_mcp_rows(operation_name: str, parameters: dict) -> dict:
+    """Requests a list operation as NDJSON and reassembles the rows into a result dict."""
+    async with _get_mcp_client().stream(
+        "POST", "/call", json={"tool": operation_name, "params": parameters, "stream": True}
+    ) as response:
+        response.raise_for_status()
+        if not response.headers.get("content-type", "").startswith("application/x-ndjson"):
+            return json.loads(await response.aread())
+        rows = [json.loads(line) async for line in response.aiter_lines() if line]
+    return {"success": True, "data": rows, "total_count": len(rows)}
+
+async def _call_mcp_operation(operation_name: str, parameters: dict) -> str:
+    """Executes an MCP operation (in-process or over HTTP) and formats the result for the agent."""
+    try:
+        if data_service is not None:
+            return _format_operation_result(await data_service.execute_operation(operation_name, **parameters))
+        if operation_name in STREAMABLE_OPERATIONS:
+            return _format_operation_result(await _stream_mcp_rows(operation_name, parameters))
+        response = await _get_mcp_client().post(
+            "/call",
+            json={"tool": operation_name, "params": parameters}
+        )
+        response.raise_for_status()
+        return _format_operation_result(response.json())
     except Exception as e:
         return f"Service Execution Failure: {str(e)}"
 
-def _execute_mcp_operation(operation_name: str, **parameters) -> str:
-    """Synchronous wrapper that runs async operation in event loop."""
+def _cache_get(cache_key: str) -> Optional[str]:
+    """Returns a cached read result if it is still fresh."""
+    cached = _read_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < READ_CACHE_TTL_SECONDS:
+        return cached[1]
+    return None
+
+def _normalize_customer_id(customer_id):
+    """Maps a customer_id to the int it names, so "5" and 5 share cache entries."""
+    try:
+        return int(customer_id)
+    except (TypeError, ValueError):
+        return customer_id
+
+def _cache_put(cache_key: str, customer_id: Optional[int], result: str) -> None:
+    """Stores a successful read result, evicting the oldest entry when full."""
+    if result.startswith(_FAILURE_PREFIXES):
+        return
+    if len(_read_cache) >= READ_CACHE_MAXSIZE:
+        _read_cache.pop(next(iter(_read_cache)))
+    _read_cache[cache_key] = (time.monotonic(), result, _normalize_customer_id(customer_id))
+
+def _invalidate_after_write(operation_name: str, parameters: dict) -> None:
+    """Drops cached reads that a write may have changed."""
+    if operation_name == "create_tickets":
+        customer_ids = {_normalize_customer_id(ticket.get("customer_id")) for ticket in parameters.get("tickets", [])}
+    else:
+        customer_ids = {_normalize_customer_id(parameters.get("customer_id"))}
+    # Entries without a customer_id are list results, which any write can change
+    for generation_key in customer_ids | {None}:
+        _write_generations[generation_key] = _write_generations.get(generation_key, 0) + 1
+    for cache_key in [k for k, (_, _, cid) in _read_cache.items() if cid is None or cid in customer_ids]:
+        _read_cache.pop(cache_key, None)
+
+async def _execute_mcp_operation_async(operation_name: str, **parameters) -> str:
+    """Executes an MCP operation, serving idempotent reads from the short-lived cache."""
+    if operation_name in WRITE_OPERATIONS:
+        result = await _call_mcp_operation(operation_name, parameters)
+        _invalidate_after_write(operation_name, parameters)
+        return result
+    if operation_name not in READ_OPERATIONS:
+        return await _call_mcp_operation(operation_name, parameters)
+
+    cache_key = json.dumps([operation_name, parameters], sort_keys=True)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    # Concurrent misses for the same key wait for a single fetch
+    lock_entry = _read_locks.setdefault(cache_key, [asyncio.Lock(), 0])
+    lock_entry[1] += 1
     try:
-        # Try to get existing event loop
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # If loop is already running, create a new task
-            import nest_asyncio
-            nest_asyncio.apply()
-            return loop.run_until_complete(_execute_mcp_operation_async(operation_name, **parameters))
-        else:
-            return loop.run_until_complete(_execute_mcp_operation_async(operation_name, **parameters))
-    except RuntimeError:
-        # No event loop exists, create a new one
-        return asyncio.run(_execute_mcp_operation_async(operation_name, **parameters))
-
-def fetch_customer_data(customer_id: int) -> str:
+        async with lock_entry[0]:
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                return cached
+            customer_id = _normalize_customer_id(parameters.get("customer_id"))
+            generation = _write_generations.get(customer_id, 0)
+            result = await _call_mcp_operation(operation_name, parameters)
+            if _write_generations.get(customer_id, 0) == generation:
+                _cache_put(cache_key, customer_id, result)
+    finally:
+        lock_entry[1] -= 1
+        if lock_entry[1] == 0:
+            _read_locks.pop(cache_key, None)
+    return result
+
+async def fetch_customer_data(customer_id: int) -> str:
     """Retrieve customer account details by ID."""
-    return _execute_mcp_operation("get_customer", customer_id=customer_id)
+    return await _execute_mcp_operation_async("get_customer", customer_id=customer_id)
 
-def search_customer_accounts(account_status: Optional[str] = None, result_limit: int = 10) -> str:
+async def search_customer_accounts(account_status: Optional[str] = None, result_limit: int = 10) -> str:
     """Search for customer accounts, optionally filtered by status."""
     parameters = {"limit": result_limit}
     if account_status:
         parameters["status"] = account_status
-    return _execute_mcp_operation("list_customers", **parameters)
+    return await _execute_mcp_operation_async("list_customers", **parameters)
+
+class UpdatePayload(BaseModel):
+    """Fields modify_customer_record may change; unknown fields are rejected."""
+    model_config = ConfigDict(extra="forbid")
+
+    full_name: Optional[str] = None
+    contact_email: Optional[str] = None
+    contact_phone: Optional[str] = None
+    account_status: Optional[Literal["active", "disabled"]] = None
+
+async def modify_customer_record(customer_id: int, update_payload: str) -> str:
+    """Update customer record fields.
 
-def modify_customer_record(customer_id: int, update_payload: str) -> str:
-    """Update customer record fields."""
+    update_payload is a JSON object string of the fields to change
+    (full_name, contact_email, contact_phone, account_status), e.g.
+    '{"contact_email": "new@email.com"}'.
+    """
     try:
-        payload_dict = json.loads(update_payload)
-    except json.JSONDecodeError:
-        return "Parsing Error: The provided data for update must be a valid JSON string."
-    return _execute_mcp_operation("update_customer", customer_id=customer_id, data=payload_dict)
+        payload_dict = UpdatePayload.model_validate_json(update_payload).model_dump(exclude_none=True)
+    except ValidationError as e:
+        if any(error["type"] == "json_invalid" for error in e.errors()):
+            return "Parsing Error: The provided data for update must be a valid JSON string."
+        # Errors without a location concern the payload itself, e.g. '"x"' or '[1]'
+        if any(not error["loc"] for error in e.errors()):
+            return "Parsing Error: The provided data for update must be a JSON object of fields."
+        problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        return f"Parsing Error: Invalid update fields - {problems}"
+    return await _execute_mcp_operation_async("update_customer", customer_id=customer_id, data=payload_dict)
 
-def register_support_issue(customer_id: int, query_description: str, urgency_level: str = "medium") -> str:
-    """Create a new support ticket."""
-    return _execute_mcp_operation("create_ticket", customer_id=customer_id, issue=query_description, priority=urgency_level)
+async def register_support_issue(customer_id: int, query_description: str, urgency_level: str = "medium") -> str:
+    """Create a new support ticket.
 
-def retrieve_customer_history(customer_id: int) -> str:
+    urgency_level is "high" for billing issues, refunds, outages or urgent
+    wording ("immediately", "asap"); "medium" for upgrades, service requests
+    and general questions; "low" for password resets and minor inquiries.
+    """
+    return await _execute_mcp_operation_async("create_ticket", customer_id=customer_id, issue=query_description, priority=urgency_level)
+
+async def register_support_issues(tickets: str) -> str:
+    """Create several support tickets at once.
+
+    tickets is a JSON array string of ticket objects, each with customer_id,
+    query_description and urgency_level (same meaning as for
+    register_support_issue), e.g.
+    '[{"customer_id": 1, "query_description": "Refund request", "urgency_level": "high"}]'.
+    """
+    try:
+        tickets = json.loads(tickets)
+    except (TypeError, ValueError):
+        return "Parsing Error: The provided tickets must be a valid JSON string."
+    if not isinstance(tickets, list):
+        return "Parsing Error: The provided tickets must be a JSON array of ticket objects."
+    try:
+        ticket_payload = [
+            {
+                "customer_id": int(ticket["customer_id"]),
+                "issue": ticket["query_description"],
+                "priority": ticket.get("urgency_level", "medium"),
+            }
+            for ticket in tickets
+        ]
+    except KeyError as e:
+        return f"Parsing Error: Each ticket needs customer_id and query_description (missing {e})."
+    except (TypeError, ValueError):
+        return "Parsing Error: Each ticket must be an object with an integer customer_id."
+    return await _execute_mcp_operation_async("create_tickets", tickets=ticket_payload)
+
+async def retrieve_customer_history(customer_id: int) -> str:
     """Get all support tickets for a customer."""
-    return _execute_mcp_operation("get_customer_history", customer_id=customer_id)
+    return await _execute_mcp_operation_async("get_customer_history", customer_id=customer_id)
+
+async def list_active_accounts_with_open_tickets(result_limit: int = 10) -> str:
+    """List active customer accounts that have at least one open support ticket."""
+    return await _execute_mcp_operation_async("list_active_customers_with_open_tickets", limit=result_limit)
+
+async def retrieve_histories(customer_ids: List[int]) -> str:
+    """Get all support tickets for several customers in one call."""
+    histories = await asyncio.gather(
+        *(_execute_mcp_operation_async("get_customer_history", customer_id=customer_id) for customer_id in customer_ids)
+    )
+    return "\n\n".join(
+        f"Customer {customer_id}:\n{history}" for customer_id, history in zip(customer_ids, histories)
+    )
 
 def generate_agent_tools() -> List[callable]:
     """Generate list of tool functions for agents."""
@@ -76,7 +285,10 @@ def generate_agent_tools() -> List[callable]:
         search_customer_accounts,
         modify_customer_record,
         register_support_issue,
+        register_support_issues,
         retrieve_customer_history,
+        retrieve_histories,
+        list_active_accounts_with_open_tickets,
     ]
 
 AGENT_TOOLS = generate_agent_tools()
\ No newline at end of file